@@ -0,0 +1,68 @@
+"""
+Model cascade - acceptance checks on extracted data
+"""
+
+import logging
+from typing import Any, Dict, List
+
+from . import schema
+
+
+logger = logging.getLogger(__name__)
+
+
+# Values considered as missing in LLM outputs
+EMPTY_VALUES = ("", "none", "null", "n/a", "unknown")
+
+
+def is_empty_value(value: Any) -> bool:
+    """Check whether an extracted value is missing"""
+    if value is None:
+        return True
+    return str(value).strip().lower() in EMPTY_VALUES
+
+
+def check_acceptance(
+    json_object: Dict[str, Any], max_invalid_ratio: float = 0.5
+) -> List[str]:
+    """
+    Cheap acceptance checks on validated LLM output
+    Notes: used to decide whether a larger model should be called
+    Args:
+        - json_object: validated JSON object (LLM output before cleaning)
+        - max_invalid_ratio: maximum share of medications failing OpenFDA validation
+    Returns:
+        - list of failed checks (empty list when output is accepted)
+    """
+    issues = []
+
+    # Check 1 - Schema completeness (patient information)
+    patient_info = json_object.get("patient_info") or {}
+    for field_name in schema.PatientInfo.model_fields:
+        if is_empty_value(patient_info.get(field_name)):
+            issues.append(f"missing patient_info.{field_name}")
+
+    # Check 2 - Medications available
+    medication_list = json_object.get("medications") or []
+    if len(medication_list) == 0:
+        issues.append("no medication extracted")
+        return issues
+
+    # Check 3 - Empty dosage fields (before combining dosage and frequency)
+    nb_empty_dosage = sum(
+        1 for item in medication_list if is_empty_value(item.get("dosage_info"))
+    )
+    if nb_empty_dosage > 0:
+        issues.append(f"{nb_empty_dosage} medication(s) with empty dosage")
+
+    # Check 4 - Share of medications failing OpenFDA validation
+    nb_invalid = sum(1 for item in medication_list if item.get("validated") is not True)
+    invalid_ratio = nb_invalid / len(medication_list)
+    if invalid_ratio > max_invalid_ratio:
+        issues.append(
+            f"{invalid_ratio:.0%} medications failing OpenFDA validation "
+            f"(max {max_invalid_ratio:.0%})"
+        )
+
+    logger.debug("\t Acceptance checks - issues: %s", issues)
+    return issues
@@ -0,0 +1,256 @@
+"""
+Record / replay layer - Mistral and OpenFDA traffic
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import importlib
+import threading
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+from langchain_core.embeddings import Embeddings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Cassette modes
+RECORD = "record"
+REPLAY = "replay"
+
+# Response fields not recorded (large payloads, unused by the pipeline)
+REDACTED_FIELDS = ("image_base64",)
+
+
+class RecordedAPIError(Exception):
+    """Replayed API error, when the original exception cannot be rebuilt"""
+
+
+def _json_default(value: Any) -> Any:
+    """
+    JSON conversion of request arguments
+    Notes: pydantic classes (e.g. response_format) converted to JSON schema,
+    independent of import path, and sensitive to schema updates
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return value.model_json_schema()
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    return str(value)
+
+
+def request_fingerprint(endpoint: str, kwargs: Dict[str, Any]) -> str:
+    """Request fingerprint (SHA-256 of endpoint and arguments)"""
+    request = json.dumps(
+        {"endpoint": endpoint, "kwargs": kwargs}, sort_keys=True, default=_json_default
+    )
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+def _redact(data: Any) -> Any:
+    """Remove redacted fields from JSON response"""
+    if isinstance(data, dict):
+        return {
+            key: _redact(value)
+            for key, value in data.items()
+            if key not in REDACTED_FIELDS
+        }
+    if isinstance(data, list):
+        return [_redact(value) for value in data]
+    return data
+
+
+def _rebuild_error(error: Dict[str, str]) -> Exception:
+    """Rebuild recorded API error (original exception type when possible)"""
+    try:
+        error_class = getattr(importlib.import_module(error["module"]), error["type"])
+        if isinstance(error_class, type) and issubclass(error_class, Exception):
+            return error_class(error["message"])
+    except Exception:  # pylint: disable=broad-except
+        pass
+    return RecordedAPIError(f"{error['type']}: {error['message']}")
+
+
+def _to_namespace(data: Any) -> Any:
+    """Convert JSON response to object with attribute access (SDK stand-in)"""
+    if isinstance(data, dict):
+        return SimpleNamespace(
+            **{key: _to_namespace(value) for key, value in data.items()}
+        )
+    if isinstance(data, list):
+        return [_to_namespace(value) for value in data]
+    return data
+
+
+class Cassette:
+    """
+    Cassette class
+    Notes: records API responses (gzip-compressed JSON file), keyed by
+    request fingerprints, and replays them without any API call.
+    Requests are only stored as fingerprints (no document content, no API key).
+    """
+
+    def __init__(self, cassette_file: str, mode: str):
+        """Initialize class"""
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Invalid cassette mode {mode}!")
+        self.cassette_file = cassette_file
+        self.mode = mode
+        self.interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._replay_counter = Counter()
+        self._lock = threading.Lock()
+        if mode == REPLAY:
+            self._load()
+
+    def _load(self):
+        """Load cassette file"""
+        if not os.path.exists(self.cassette_file):
+            raise FileNotFoundError(f"File {self.cassette_file} not found!")
+        with gzip.open(self.cassette_file, "rt", encoding="utf-8") as f:
+            self.interactions = json.load(f)["interactions"]
+        logger.info(
+            "\t Replaying cassette %s (%d requests)",
+            self.cassette_file,
+            len(self.interactions),
+        )
+
+    def save(self):
+        """Save cassette file (record mode)"""
+        if self.mode != RECORD:
+            return
+        logger.info("\t Saving cassette %s", self.cassette_file)
+        # Serialize under lock (hedged requests may still be recorded)
+        with self._lock:
+            content = json.dumps({"version": 1, "interactions": self.interactions})
+        with gzip.open(self.cassette_file, "wt", encoding="utf-8") as f:
+            f.write(content)
+
+    def call(self, endpoint: str, func: Callable[..., Any], **kwargs) -> Any:
+        """
+        Recorded / replayed API call
+        Args:
+            - endpoint: API endpoint name
+            - func: API function (not called in replay mode)
+            - kwargs: API function arguments
+        Returns:
+            - API response
+        """
+        fingerprint = request_fingerprint(endpoint, kwargs)
+        if self.mode == REPLAY:
+            return self._replay(endpoint, fingerprint)
+
+        start = time.perf_counter()
+        try:
+            response = func(**kwargs)
+        except Exception as error:
+            # Record API errors (e.g. timeouts), re-raised on replay
+            self._record(
+                fingerprint,
+                {
+                    "endpoint": endpoint,
+                    "duration": round(time.perf_counter() - start, 3),
+                    "error": {
+                        "module": type(error).__module__,
+                        "type": type(error).__qualname__,
+                        "message": str(error),
+                    },
+                },
+            )
+            raise
+        duration = time.perf_counter() - start
+
+        is_model = isinstance(response, BaseModel)
+        data = response.model_dump(mode="json") if is_model else response
+        interaction = {
+            "endpoint": endpoint,
+            "duration": round(duration, 3),
+            "object": is_model,
+            "response": _redact(data),
+        }
+        self._record(fingerprint, interaction)
+        return response
+
+    def _record(self, fingerprint: str, interaction: Dict[str, Any]):
+        """Record interaction (response or error)"""
+        with self._lock:
+            self.interactions.setdefault(fingerprint, []).append(interaction)
+
+    def _replay(self, endpoint: str, fingerprint: str) -> Any:
+        """Replay recorded response (repeated requests replayed in order)"""
+        interactions = self.interactions.get(fingerprint)
+        if not interactions:
+            raise LookupError(
+                f"No recorded response for {endpoint} request {fingerprint[:12]}!"
+            )
+        with self._lock:
+            index = min(self._replay_counter[fingerprint], len(interactions) - 1)
+            self._replay_counter[fingerprint] += 1
+        interaction = interactions[index]
+        if "error" in interaction:
+            raise _rebuild_error(interaction["error"])
+        if interaction["object"]:
+            return _to_namespace(interaction["response"])
+        return interaction["response"]
+
+    def wrap_client(self, client: object) -> object:
+        """Wrap API client (e.g. mistral client) with cassette"""
+        return CassetteProxy(self, client, "mistral")
+
+    def wrap_embeddings(self, embeddings: Embeddings) -> Embeddings:
+        """Wrap embedding model with cassette"""
+        return CassetteEmbeddings(self, embeddings)
+
+
+class CassetteProxy:
+    """Stand-in for API client, routing method calls via cassette"""
+
+    def __init__(self, cassette: Cassette, target: object, endpoint: str):
+        """Initialize class"""
+        self._cassette = cassette
+        self._target = target
+        self._endpoint = endpoint
+
+    def __getattr__(self, name: str) -> "CassetteProxy":
+        return CassetteProxy(
+            self._cassette, getattr(self._target, name), f"{self._endpoint}.{name}"
+        )
+
+    def __call__(self, **kwargs) -> Any:
+        return self._cassette.call(self._endpoint, self._target, **kwargs)
+
+
+class CassetteEmbeddings(Embeddings):
+    """Embedding model, routing embedding requests via cassette"""
+
+    def __init__(self, cassette: Cassette, embeddings: Embeddings):
+        """Initialize class"""
+        self.cassette = cassette
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.cassette.call(
+            "mistral.embeddings.documents", self.embeddings.embed_documents, texts=texts
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.cassette.call(
+            "mistral.embeddings.query", self.embeddings.embed_query, text=text
+        )
+
+
+def recorded_call(
+    cassette: Optional[Cassette], endpoint: str, func: Callable[..., Any], **kwargs
+) -> Any:
+    """API call, recorded / replayed only when a cassette is provided"""
+    if cassette is None:
+        return func(**kwargs)
+    return cassette.call(endpoint, func, **kwargs)
@@ -0,0 +1,191 @@
+"""
+Context compaction - reduce OCR output size before LLM extraction
+"""
+
+import re
+import math
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+# Markdown patterns from OCR output
+IMAGE_PATTERN = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+PAGE_MARKER_PATTERN = re.compile(r"^### Page \d+$")
+TABLE_SEPARATOR_PATTERN = re.compile(r"^\|?(\s*:?-+:?\s*\|)+\s*:?-*:?\s*$")
+LIST_ITEM_PATTERN = re.compile(r"^([-*+]|\d+[.)])\s")
+DOSAGE_PATTERN = re.compile(
+    r"\d\s*(mg|mcg|µg|g|kg|ml|l|units?|iu|meq|%)(?!\w)", re.IGNORECASE
+)
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Number of lines at page start / end, checked for repeated headers and footers
+BOILERPLATE_LINES = 3
+
+
+def token_cost(token: str) -> int:
+    """Estimate number of LLM tokens for a word (chunks of 4 characters)"""
+    return math.ceil(len(token) / 4)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate number of LLM tokens"""
+    return sum(token_cost(token) for token in TOKEN_PATTERN.findall(text))
+
+
+def split_pages(pdf_content: str) -> List[List[str]]:
+    """Split OCR output into pages (list of lines), removing page markers"""
+    pages = [[]]
+    for line in pdf_content.splitlines():
+        if PAGE_MARKER_PATTERN.match(line.strip()):
+            pages.append([])
+        else:
+            pages[-1].append(line)
+    return [page for page in pages if any(line.strip() for line in page)]
+
+
+def is_content_line(line: str) -> bool:
+    """
+    Check whether a line holds document content (never deduplicated):
+    table row, list item, or dosage-like value (e.g. "Aspirin 81 mg daily")
+    """
+    return (
+        line.startswith("|")
+        or bool(LIST_ITEM_PATTERN.match(line))
+        or bool(DOSAGE_PATTERN.search(line))
+    )
+
+
+def edge_line_positions(page: List[str]) -> Dict[int, Set[str]]:
+    """
+    Edge positions of first and last non-empty lines of a page (headers, footers)
+    Returns:
+        - line index -> positions (e.g. "top_0" for first line, "bottom_0" for last)
+    """
+    indices = [idx for idx, line in enumerate(page) if line.strip()]
+    positions = defaultdict(set)
+    for rank, idx in enumerate(indices[:BOILERPLATE_LINES]):
+        positions[idx].add(f"top_{rank}")
+    for rank, idx in enumerate(reversed(indices[-BOILERPLATE_LINES:])):
+        positions[idx].add(f"bottom_{rank}")
+    return positions
+
+
+def find_boilerplate_lines(pages: List[List[str]]) -> Set[Tuple[str, str]]:
+    """Find header and footer lines, at the same page edge position on most pages"""
+    counter = Counter()
+    for page in pages:
+        for idx, positions in edge_line_positions(page).items():
+            line = page[idx].strip()
+            if not is_content_line(line):
+                counter.update((position, line) for position in positions)
+    return {
+        position_line
+        for position_line, count in counter.items()
+        if count > 1 and count > len(pages) / 2
+    }
+
+
+def compact_line(line: str) -> str:
+    """
+    Remove image references, and collapse table padding and whitespaces
+    Notes: leading indentation is kept (e.g. nested lists)
+    """
+    line = IMAGE_PATTERN.sub("", line).rstrip()
+    content = line.lstrip()
+    if not content:
+        return ""
+    indentation = line[: len(line) - len(content)]
+    if TABLE_SEPARATOR_PATTERN.match(content):
+        nb_columns = content.strip("|").count("|") + 1
+        return indentation + "|" + "---|" * nb_columns
+    if content.startswith("|"):
+        content = re.sub(r"\s*\|\s*", " | ", content).strip()
+    return indentation + re.sub(r"[ \t]+", " ", content)
+
+
+def truncate_to_budget(text: str, token_budget: int) -> str:
+    """
+    Truncate text to fit token budget
+    Notes: document start and end are kept (e.g. medications at discharge),
+    the middle of the document is removed (cut mid-line if needed)
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+    logger.warning("\t Context truncated to token budget (%d)", token_budget)
+    tokens = list(TOKEN_PATTERN.finditer(text))
+
+    # Document start - half of token budget
+    head_end, nb_tokens = 0, 0
+    for match in tokens:
+        if nb_tokens + token_cost(match.group()) > token_budget // 2:
+            break
+        nb_tokens += token_cost(match.group())
+        head_end = match.end()
+
+    # Document end - remaining token budget
+    tail_start, tail_budget, nb_tokens = len(text), token_budget - nb_tokens, 0
+    for match in reversed(tokens):
+        if nb_tokens + token_cost(match.group()) > tail_budget:
+            break
+        nb_tokens += token_cost(match.group())
+        tail_start = match.start()
+
+    truncated_text = (text[:head_end] + "\n\n" + text[tail_start:]).strip()
+    if not truncated_text:
+        # Single word above token budget
+        truncated_text = text.strip()[: token_budget * 4]
+    return truncated_text
+
+
+def compact_context(pdf_content: str, token_budget: Optional[int] = None) -> str:
+    """
+    Context compaction on OCR output
+    Args:
+        - pdf_content: OCR output (markdown, with page markers)
+        - token_budget: optional maximum number of (estimated) tokens
+    Returns:
+        - compacted content
+    """
+    if token_budget is not None and token_budget <= 0:
+        raise ValueError(f"Invalid token budget {token_budget}!")
+    nb_tokens_before = estimate_tokens(pdf_content)
+
+    pages = split_pages(pdf_content)
+    boilerplate_lines = find_boilerplate_lines(pages)
+    seen_boilerplate = set()
+
+    compacted_lines = []
+    for page in pages:
+        edge_positions = edge_line_positions(page)
+        for idx, line in enumerate(page):
+            stripped_line = line.strip()
+            # Keep first occurrence of repeated headers and footers
+            if any(
+                (position, stripped_line) in boilerplate_lines
+                for position in edge_positions.get(idx, ())
+            ):
+                if stripped_line in seen_boilerplate:
+                    continue
+                seen_boilerplate.add(stripped_line)
+            line = compact_line(line)
+            # Collapse consecutive empty lines
+            if not line and (not compacted_lines or not compacted_lines[-1]):
+                continue
+            compacted_lines.append(line)
+        if compacted_lines and compacted_lines[-1]:
+            compacted_lines.append("")
+
+    compacted_content = "\n".join(compacted_lines).strip()
+    if token_budget is not None:
+        compacted_content = truncate_to_budget(compacted_content, token_budget)
+
+    logger.info(
+        "\t Context compaction - tokens: %d -> %d",
+        nb_tokens_before,
+        estimate_tokens(compacted_content),
+    )
+    return compacted_content
@@ -0,0 +1,148 @@
+"""
+OCR corpus store - compressed OCR outputs keyed by document hash
+"""
+
+import os
+import json
+import zlib
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from . import utils
+
+try:
+    import fcntl
+except ImportError:  # e.g. Windows - no lock across processes
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def hash_text(text: str) -> str:
+    """Document hash (SHA-256) of OCR output"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class OCRCorpus:
+    """
+    OCR corpus class
+    Notes: append-only data file of zlib-compressed OCR outputs
+    (ocr_corpus.bin), with an append-only offset index (ocr_corpus.idx,
+    one JSON line per document: key, name, offset, size).
+    Appends are locked (fcntl), to fill a corpus from concurrent runs
+    (thread lock only where fcntl is not available, e.g. Windows).
+    """
+
+    def __init__(self, corpus_dir: str):
+        """Initialize class"""
+        os.makedirs(corpus_dir, exist_ok=True)
+        self.data_file = os.path.join(corpus_dir, "ocr_corpus.bin")
+        self.index_file = os.path.join(corpus_dir, "ocr_corpus.idx")
+        self.lock_file = os.path.join(corpus_dir, "ocr_corpus.lock")
+        self.index: Dict[str, Dict[str, object]] = {}
+        self._index_position = 0
+        self._thread_lock = threading.Lock()
+        with self._lock():
+            self._refresh_index()
+        logger.debug("\t OCR corpus - %d documents", len(self.index))
+
+    @contextmanager
+    def _lock(self):
+        """Exclusive corpus lock, across threads and processes"""
+        with self._thread_lock, open(self.lock_file, "a", encoding="utf-8") as f:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh_index(self):
+        """
+        Read new index lines (e.g. appended by other runs), under corpus lock
+        Notes: a torn final line (interrupted append) is truncated
+        """
+        if not os.path.exists(self.index_file):
+            return
+        with open(self.index_file, "rb+") as f:
+            f.seek(self._index_position)
+            for line in f.read().splitlines(keepends=True):
+                if not line.endswith(b"\n"):
+                    logger.warning("\t OCR corpus - removing torn index line")
+                    f.truncate(self._index_position)
+                    break
+                self._index_position += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning("\t OCR corpus - skipping invalid index line")
+                    continue
+                self.index[record["key"]] = record
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def add(self, key: str, name: str, content: str) -> bool:
+        """
+        Append OCR output to corpus
+        Args:
+            - key: document hash (see hash_text)
+            - name: document name (e.g. PDF file stem)
+            - content: OCR output (markdown)
+        Returns:
+            - True if added, False if document already stored
+        """
+        data = zlib.compress(content.encode("utf-8"))
+        with self._lock():
+            self._refresh_index()
+            if key in self.index:
+                return False
+
+            with open(self.data_file, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(data)
+            record = {"key": key, "name": name, "offset": offset, "size": len(data)}
+            line = (json.dumps(record) + "\n").encode("utf-8")
+            with open(self.index_file, "ab") as f:
+                f.write(line)
+            self._index_position += len(line)
+            self.index[key] = record
+        return True
+
+    def add_markdown_file(self, input_path: str) -> bool:
+        """Append OCR markdown file (e.g. *_ocr.md file from QC) to corpus"""
+        content = utils.read_markdown_file(input_path)
+        name = Path(input_path).stem.removesuffix("_ocr")
+        return self.add(hash_text(content), name, content)
+
+    def get(self, key: str) -> str:
+        """Read OCR output from corpus"""
+        record = self.index[key]
+        with open(self.data_file, "rb") as f:
+            f.seek(record["offset"])
+            data = f.read(record["size"])
+        return zlib.decompress(data).decode("utf-8")
+
+    def iter_documents(self) -> Iterator[Tuple[str, str, str]]:
+        """Stream documents (key, name, OCR output), in storage order"""
+        if not self.index:
+            return
+        records = sorted(self.index.values(), key=lambda record: record["offset"])
+        with open(self.data_file, "rb") as f:
+            for record in records:
+                f.seek(record["offset"])
+                data = f.read(record["size"])
+                content = zlib.decompress(data).decode("utf-8")
+                yield record["key"], record["name"], content
@@ -5,7 +5,7 @@ Data extraction
 import os
 import json
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from langchain_text_splitters import MarkdownHeaderTextSplitter
 from langchain_core.vectorstores import InMemoryVectorStore
@@ -13,6 +13,8 @@ from langchain_mistralai import MistralAIEmbeddings
 
 from . import schema
 from . import utils
+from .cassette import Cassette
+from .hedging import RequestHedger, hedged_call
 from .phoenix_tracer import tracer
 
 
@@ -43,12 +45,13 @@ def retrieve_llm_prompt(prompt_type: str) -> str:
 
 
 @tracer.chain
-def doc_retrieval(pdf_content: str, query) -> str:
+def doc_retrieval(pdf_content: str, query, cassette: Optional[Cassette] = None) -> str:
     """
     Perform doc retrieval using mistral embedding and chromadb vector database
     Args:
         - pdf_content: input document
         - query: user query for document retrieval
+        - cassette: optional cassette (record / replay API traffic)
     Returns:
         - retrieved content
     """
@@ -66,6 +69,8 @@ def doc_retrieval(pdf_content: str, query) -> str:
 
     # Step 2 - Generate embeddings for each text chunk (via Mistral Embeddings API)
     text_embeddings = MistralAIEmbeddings(model="mistral-embed")
+    if cassette is not None:
+        text_embeddings = cassette.wrap_embeddings(text_embeddings)
 
     # Step 3- Add embeddings to in-memory vector store
     vector_store = InMemoryVectorStore(text_embeddings)
@@ -81,7 +86,12 @@ def doc_retrieval(pdf_content: str, query) -> str:
 
 @tracer.chain
 def llm_extraction(
-    text_model: str, mistral_client: object, pdf_content: str, rag: bool = False
+    text_model: str,
+    mistral_client: object,
+    pdf_content: str,
+    rag: bool = False,
+    hedger: Optional[RequestHedger] = None,
+    cassette: Optional[Cassette] = None,
 ) -> Dict[str, Any]:
     """
     Data extraction via LLM
@@ -90,6 +100,8 @@ def llm_extraction(
         - mistral_client: mistral client
         - pdf_content: input document
         - rag: optional retrieval strategy
+        - hedger: optional request hedger (tail latency)
+        - cassette: optional cassette (record / replay of embedding requests)
     Returns:
         - LLM response
     """
@@ -100,14 +112,13 @@ def llm_extraction(
     # Option to perform Retrieval Augmented Generation
     if rag:
         logger.info("\t Performing document retrieval")
-        context = doc_retrieval(pdf_content, prompt)
+        context = doc_retrieval(pdf_content, prompt, cassette)
         logger.debug("\nRetrieved context: \n %s", context)
     else:
         context = pdf_content
 
-    # Optional - Add context to prompt (full pdf_content or retrieved context)
-    if context:
-        prompt = prompt.format(context=context)
+    # Add context to prompt (full pdf_content or retrieved context)
+    prompt = prompt.format(context=context)
 
     messages = [
         {
@@ -117,7 +128,10 @@ def llm_extraction(
     ]
 
     # Use of function "parse" to require specific structure output
-    chat_response = mistral_client.chat.parse(
+    chat_response = hedged_call(
+        hedger,
+        f"chat:{text_model}",
+        mistral_client.chat.parse,
         model=text_model,
         messages=messages,
         response_format=schema.MedicalReport,
@@ -130,13 +144,19 @@ def llm_extraction(
 
 
 @tracer.chain
-def llm_qna(text_model: str, mistral_client: object, pdf_file: str) -> Dict[str, Any]:
+def llm_qna(
+    text_model: str,
+    mistral_client: object,
+    pdf_file: str,
+    hedger: Optional[RequestHedger] = None,
+) -> Dict[str, Any]:
     """
     Direct document Question & Answer - OCR + LLM combined
     Args:
         - text_model: LLM text model
         - mistral_client: mistral client
         - pdf_file: input PDF document
+        - hedger: optional request hedger (tail latency)
     Returns:
         - LLM response
     """
@@ -161,7 +181,10 @@ def llm_qna(text_model: str, mistral_client: object, pdf_file: str) -> Dict[str,
     ]
 
     # Use of function "parse" to require specific structure output
-    chat_response = mistral_client.chat.parse(
+    chat_response = hedged_call(
+        hedger,
+        f"chat:{text_model}",
+        mistral_client.chat.parse,
         model=text_model,
         messages=messages,
         response_format=schema.MedicalReport,
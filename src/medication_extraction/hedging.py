@@ -0,0 +1,194 @@
+"""
+Hedged requests - duplicate slow API calls to cut tail latency
+"""
+
+import os
+import json
+import math
+import time
+import logging
+import threading
+import contextvars
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestHedger:
+    """
+    Request hedger class
+    Notes: when a call exceeds a percentile of recently observed latency
+    (per endpoint/model key), a duplicate request is issued and the first
+    successful response is used. Calls must be idempotent (e.g. temperature=0).
+    Latencies can be seeded with an initial delay, or persisted across runs.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_extra_load: float = 0.1,
+        window_size: int = 100,
+        min_samples: int = 10,
+        initial_delay: Optional[float] = None,
+    ):
+        """
+        Initialize class
+        Args:
+            - percentile: latency percentile triggering a hedged request
+            - max_extra_load: maximum ratio of hedged requests over all calls
+            - window_size: number of recent latencies kept per key
+            - min_samples: minimum number of latencies before using percentile
+            - initial_delay: optional hedging delay (in seconds), used before
+              enough latencies are observed for a key
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError(f"Invalid percentile {percentile}!")
+        if max_extra_load < 0:
+            raise ValueError(f"Invalid max_extra_load {max_extra_load}!")
+        self.percentile = percentile
+        self.max_extra_load = max_extra_load
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.latencies: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=window_size)
+        )
+        self.nb_calls = 0
+        self.nb_hedges = 0
+        self._lock = threading.Lock()
+
+    def load_latencies(self, latency_file: str):
+        """Load latencies from previous runs (JSON file), if available"""
+        if not os.path.exists(latency_file):
+            return
+        with open(latency_file, "r", encoding="utf-8") as f:
+            latencies = json.load(f)
+        with self._lock:
+            for key, samples in latencies.items():
+                self.latencies[key].extend(samples)
+        logger.debug("\t Hedging - latencies loaded for %d keys", len(latencies))
+
+    def save_latencies(self, latency_file: str):
+        """Save recent latencies (JSON file), for next runs"""
+        with self._lock:
+            latencies = {key: list(samples) for key, samples in self.latencies.items()}
+        with open(latency_file, "w", encoding="utf-8") as f:
+            json.dump(latencies, f, indent=4)
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Hedging delay (in seconds) for a key, None if no hedging"""
+        with self._lock:
+            samples = sorted(self.latencies[key])
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        rank = math.ceil(self.percentile / 100 * len(samples)) - 1
+        return samples[max(rank, 0)]
+
+    def _record_latency(self, key: str, latency: float):
+        """Record latency of a successful call"""
+        with self._lock:
+            self.latencies[key].append(latency)
+
+    def _reserve_hedge(self) -> bool:
+        """Reserve a hedged request, within the extra load budget"""
+        with self._lock:
+            if self.nb_hedges + 1 > math.ceil(self.max_extra_load * self.nb_calls):
+                return False
+            self.nb_hedges += 1
+            return True
+
+    @staticmethod
+    def _submit(func: Callable[..., Any], kwargs: Dict[str, Any]) -> Future:
+        """
+        Start timed call in a daemon thread, propagating context (e.g. tracing spans)
+        Notes: no thread pool (no queuing delay), and hung calls do not block exit
+        """
+        future = Future()
+        context = contextvars.copy_context()
+
+        def run_call():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(context.run(_timed_call, func, kwargs))
+            except BaseException as error:  # pylint: disable=broad-except
+                future.set_exception(error)
+
+        threading.Thread(target=run_call, name="hedging", daemon=True).start()
+        return future
+
+    def call(self, key: str, func: Callable[..., Any], **kwargs) -> Any:
+        """
+        Hedged API call
+        Args:
+            - key: endpoint/model key used for latency statistics
+            - func: API function
+            - kwargs: API function arguments
+        Returns:
+            - API response (first successful response)
+        """
+        with self._lock:
+            self.nb_calls += 1
+
+        delay = self.hedge_delay(key)
+        if delay is None:
+            response, latency = _timed_call(func, kwargs)
+            self._record_latency(key, latency)
+            return response
+
+        start = time.perf_counter()
+        primary = self._submit(func, kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._reserve_hedge():
+            response, latency = primary.result()
+            self._record_latency(key, latency)
+            return response
+
+        logger.info("\t Hedging request %s (after %.1f s)", key, delay)
+        hedge = self._submit(func, kwargs)
+        return self._first_success(key, primary, hedge, start)
+
+    def _first_success(
+        self, key: str, primary: Future, hedge: Future, start: float
+    ) -> Any:
+        """
+        Return first successful response, cancelling the other request
+        Notes: when the hedge wins, the primary elapsed time (lower bound of its
+        latency) is recorded, so slow calls keep weighing on the percentile
+        """
+        futures = [primary, hedge]
+        error = None
+        while futures:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # Best effort - running calls cannot be interrupted,
+                    # their response is discarded
+                    for other in pending:
+                        other.cancel()
+                    response, latency = future.result()
+                    if future is hedge:
+                        latency = time.perf_counter() - start
+                    self._record_latency(key, latency)
+                    return response
+                error = future.exception()
+            futures = list(pending)
+        raise error
+
+
+def _timed_call(func: Callable[..., Any], kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+    """Call function and measure its latency"""
+    start = time.perf_counter()
+    response = func(**kwargs)
+    return response, time.perf_counter() - start
+
+
+def hedged_call(
+    hedger: Optional[RequestHedger], key: str, func: Callable[..., Any], **kwargs
+) -> Any:
+    """API call, hedged only when a request hedger is provided"""
+    if hedger is None:
+        return func(**kwargs)
+    return hedger.call(key, func, **kwargs)
@@ -3,14 +3,70 @@ Main module - Command Line Interface
 """
 
 import logging
+from pathlib import Path
+from typing import Optional
 import typer
 from typing_extensions import Annotated
 
 
 from . import pipeline
+from .cassette import RECORD, REPLAY, Cassette
+from .corpus import OCRCorpus
+from .hedging import RequestHedger
 
 
 app = typer.Typer()
+reextract_app = typer.Typer()
+
+
+def initialize_cassette(
+    record_cassette: Optional[str], replay_cassette: Optional[str]
+) -> Optional[Cassette]:
+    """Initialize optional cassette (record or replay API traffic)"""
+    if record_cassette and replay_cassette:
+        raise typer.BadParameter("Use either record or replay cassette, not both")
+    if record_cassette:
+        return Cassette(record_cassette, RECORD)
+    if replay_cassette:
+        return Cassette(replay_cassette, REPLAY)
+    return None
+
+
+def initialize_hedger(
+    hedging: bool,
+    hedge_percentile: float,
+    hedge_max_extra_load: float,
+    hedge_initial_delay: Optional[float],
+    hedge_latency_file: Optional[str],
+) -> Optional[RequestHedger]:
+    """Initialize optional request hedger (latencies from previous runs)"""
+    if not hedging:
+        return None
+    hedger = RequestHedger(
+        percentile=hedge_percentile,
+        max_extra_load=hedge_max_extra_load,
+        initial_delay=hedge_initial_delay,
+    )
+    if hedge_latency_file:
+        hedger.load_latencies(hedge_latency_file)
+    return hedger
+
+
+def save_run_state(
+    cassette: Optional[Cassette],
+    hedger: Optional[RequestHedger],
+    hedge_latency_file: Optional[str],
+):
+    """
+    Save cassette file and hedging latencies at the end of a run
+    Notes: replayed latencies are not saved (no real API call)
+    """
+    if cassette is not None:
+        cassette.save()
+    if cassette is not None and cassette.mode == REPLAY:
+        return
+    if hedger is not None and hedge_latency_file:
+        hedger.save_latencies(hedge_latency_file)
 
 
 @app.command()
@@ -28,9 +84,63 @@ def main(
     rag: Annotated[
         bool, typer.Option(help="Perform Retrieval Augmented Generation (RAG)")
     ] = False,
+    fallback_text_model: Annotated[
+        Optional[str],
+        typer.Option(help="Larger LLM model, used when acceptance checks fail"),
+    ] = None,
+    max_invalid_ratio: Annotated[
+        float,
+        typer.Option(help="Maximum share of medications failing OpenFDA validation"),
+    ] = 0.5,
+    hedging: Annotated[
+        bool, typer.Option(help="Hedge slow OCR and LLM requests (tail latency)")
+    ] = False,
+    hedge_percentile: Annotated[
+        float, typer.Option(help="Latency percentile triggering a hedged request")
+    ] = 95.0,
+    hedge_max_extra_load: Annotated[
+        float, typer.Option(help="Maximum ratio of hedged requests")
+    ] = 0.1,
+    hedge_initial_delay: Annotated[
+        Optional[float],
+        typer.Option(help="Hedging delay (seconds) before latencies are observed"),
+    ] = None,
+    hedge_latency_file: Annotated[
+        Optional[str],
+        typer.Option(help="JSON file persisting request latencies across runs"),
+    ] = None,
+    ocr_corpus: Annotated[
+        Optional[str], typer.Option(help="OCR corpus folder - store OCR output")
+    ] = None,
+    compact_context: Annotated[
+        bool, typer.Option(help="Compact OCR output before LLM extraction")
+    ] = False,
+    token_budget: Annotated[
+        Optional[int],
+        typer.Option(help="Maximum number of tokens in LLM context (compaction)"),
+    ] = None,
+    record_cassette: Annotated[
+        Optional[str], typer.Option(help="Record API traffic in cassette file")
+    ] = None,
+    replay_cassette: Annotated[
+        Optional[str], typer.Option(help="Replay API traffic from cassette file")
+    ] = None,
 ):
     """Main command"""
     logging.basicConfig(level=logging.INFO)
+    if direct_qna and (compact_context or token_budget is not None):
+        raise typer.BadParameter(
+            "Context compaction (compact-context, token-budget) needs OCR output, "
+            "not available with direct-qna"
+        )
+    cassette = initialize_cassette(record_cassette, replay_cassette)
+    hedger = initialize_hedger(
+        hedging,
+        hedge_percentile,
+        hedge_max_extra_load,
+        hedge_initial_delay,
+        hedge_latency_file,
+    )
     data_extractor = pipeline.MedicalDataExtractor(
         input_pdf=input_pdf,
         output_dir=output_dir,
@@ -39,8 +149,108 @@ def main(
         qc_ocr=qc_ocr,
         direct_qna=direct_qna,
         rag=rag,
+        fallback_text_model=fallback_text_model,
+        max_invalid_ratio=max_invalid_ratio,
+        hedger=hedger,
+        ocr_corpus=OCRCorpus(ocr_corpus) if ocr_corpus else None,
+        compact_context=compact_context,
+        token_budget=token_budget,
+        cassette=cassette,
+    )
+    try:
+        data_extractor.run_workflow()
+    finally:
+        save_run_state(cassette, hedger, hedge_latency_file)
+
+
+@reextract_app.command()
+def reextract(
+    ocr_corpus: Annotated[str, typer.Option(help="OCR corpus folder")],
+    output_dir: Annotated[str, typer.Option(help="Output folder")],
+    text_model: Annotated[str, typer.Option(help="LLM model")] = "mistral-small-latest",
+    rag: Annotated[
+        bool, typer.Option(help="Perform Retrieval Augmented Generation (RAG)")
+    ] = False,
+    fallback_text_model: Annotated[
+        Optional[str],
+        typer.Option(help="Larger LLM model, used when acceptance checks fail"),
+    ] = None,
+    max_invalid_ratio: Annotated[
+        float,
+        typer.Option(help="Maximum share of medications failing OpenFDA validation"),
+    ] = 0.5,
+    hedging: Annotated[
+        bool, typer.Option(help="Hedge slow LLM requests (tail latency)")
+    ] = False,
+    hedge_percentile: Annotated[
+        float, typer.Option(help="Latency percentile triggering a hedged request")
+    ] = 95.0,
+    hedge_max_extra_load: Annotated[
+        float, typer.Option(help="Maximum ratio of hedged requests")
+    ] = 0.1,
+    hedge_initial_delay: Annotated[
+        Optional[float],
+        typer.Option(help="Hedging delay (seconds) before latencies are observed"),
+    ] = None,
+    hedge_latency_file: Annotated[
+        Optional[str],
+        typer.Option(help="JSON file persisting request latencies across runs"),
+    ] = None,
+    max_workers: Annotated[
+        int, typer.Option(help="Number of documents processed concurrently")
+    ] = 4,
+    import_ocr_dir: Annotated[
+        Optional[str],
+        typer.Option(help="Import OCR output files (*_ocr.md) into corpus first"),
+    ] = None,
+    compact_context: Annotated[
+        bool, typer.Option(help="Compact OCR output before LLM extraction")
+    ] = False,
+    token_budget: Annotated[
+        Optional[int],
+        typer.Option(help="Maximum number of tokens in LLM context (compaction)"),
+    ] = None,
+    record_cassette: Annotated[
+        Optional[str], typer.Option(help="Record API traffic in cassette file")
+    ] = None,
+    replay_cassette: Annotated[
+        Optional[str], typer.Option(help="Replay API traffic from cassette file")
+    ] = None,
+):
+    """Re-extraction command - Stage 2 to 4 on stored OCR outputs"""
+    logging.basicConfig(level=logging.INFO)
+    cassette = initialize_cassette(record_cassette, replay_cassette)
+    hedger = initialize_hedger(
+        hedging,
+        hedge_percentile,
+        hedge_max_extra_load,
+        hedge_initial_delay,
+        hedge_latency_file,
     )
-    data_extractor.run_workflow()
+    corpus = OCRCorpus(ocr_corpus)
+    if import_ocr_dir:
+        for ocr_file in sorted(Path(import_ocr_dir).glob("*_ocr.md")):
+            corpus.add_markdown_file(str(ocr_file))
+    try:
+        nb_processed, nb_failed = pipeline.reextract_corpus(
+            corpus,
+            output_dir=output_dir,
+            text_model=text_model,
+            max_workers=max_workers,
+            rag=rag,
+            fallback_text_model=fallback_text_model,
+            max_invalid_ratio=max_invalid_ratio,
+            hedger=hedger,
+            compact_context=compact_context,
+            token_budget=token_budget,
+            cassette=cassette,
+        )
+    finally:
+        save_run_state(cassette, hedger, hedge_latency_file)
+
+    typer.echo(f"Re-extraction: {nb_processed} documents, {nb_failed} failed")
+    if nb_failed > 0:
+        raise typer.Exit(code=1)
 
 
 if __name__ == "__main__":
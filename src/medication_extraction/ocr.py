@@ -2,18 +2,29 @@
 Optical Character Recognition
 """
 
+from typing import Optional
+
 from . import utils
+from .hedging import RequestHedger, hedged_call
 from .phoenix_tracer import tracer
 
 
 @tracer.chain
-def ocr_processor(pdf_file: str, mistral_client: object, ocr_model: str) -> str:
+def ocr_processor(
+    pdf_file: str,
+    mistral_client: object,
+    ocr_model: str,
+    hedger: Optional[RequestHedger] = None,
+) -> str:
     """OCR on PDF file"""
 
     # Getting the base64 string
     base64_pdf = utils.encode_pdf(pdf_file)
 
-    ocr_response = mistral_client.ocr.process(
+    ocr_response = hedged_call(
+        hedger,
+        f"ocr:{ocr_model}",
+        mistral_client.ocr.process,
         model=ocr_model,
         document={
             "type": "document_url",
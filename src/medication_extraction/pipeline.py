@@ -5,18 +5,24 @@ Pipeline module - main analysis
 import os
 from pathlib import Path
 import logging
-from typing import Tuple, Any, Dict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Tuple, Any, Dict, Optional
 
 from mistralai import Mistral
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from opentelemetry.trace import Status, StatusCode
 
+from . import cascade
+from . import compaction
+from . import corpus
 from . import extraction
 from . import ocr
 from . import schema
 from . import utils
 from . import validation
+from .cassette import Cassette
+from .hedging import RequestHedger
 from .phoenix_tracer import tracer
 
 
@@ -42,24 +48,54 @@ class MedicalDataExtractor:
 
     def __init__(
         self,
-        input_pdf: str,
+        input_pdf: Optional[str],
         output_dir: str,
-        ocr_model: str,
-        text_model: str,
+        ocr_model: str = "mistral-ocr-latest",
+        text_model: str = "mistral-small-latest",
         qc_ocr: bool = False,
         direct_qna: bool = False,
         rag: bool = False,
+        fallback_text_model: Optional[str] = None,
+        max_invalid_ratio: float = 0.5,
+        hedger: Optional[RequestHedger] = None,
+        ocr_corpus: Optional[corpus.OCRCorpus] = None,
+        mistral_client: Optional[Mistral] = None,
+        compact_context: bool = False,
+        token_budget: Optional[int] = None,
+        cassette: Optional[Cassette] = None,
+        output_name: Optional[str] = None,
     ):
-        """Initialize class"""
+        """
+        Initialize class
+        Notes: input_pdf can be None for re-extraction on stored OCR outputs,
+        output_name (output file base name) is then required.
+        A token budget enables context compaction (no OCR output with direct_qna)
+        """
+        if input_pdf is None and output_name is None:
+            raise ValueError("Output name required without input PDF file!")
+        compact_context = compact_context or token_budget is not None
+        if direct_qna and compact_context:
+            raise ValueError("Context compaction not available with direct QnA!")
         self.input_pdf = input_pdf
+        self.output_name = output_name or Path(input_pdf).stem
         self.output_dir = output_dir
         self.ocr_model = ocr_model
         self.text_model = text_model
         self.qc_ocr = qc_ocr
         self.direct_qna = direct_qna
         self.rag = rag
+        self.fallback_text_model = fallback_text_model
+        self.max_invalid_ratio = max_invalid_ratio
+        self.answered_text_model = None
+        self.hedger = hedger
+        self.ocr_corpus = ocr_corpus
+        self.compact_context = compact_context
+        self.token_budget = token_budget
+        self.cassette = cassette
         self.settings = Settings()
-        self.client = self._initialize_mistral_client()
+        self.client = mistral_client or self._initialize_mistral_client()
+        if cassette is not None:
+            self.client = cassette.wrap_client(self.client)
         self.output_ocr_file, self.output_json_file, self.output_md_file = (
             self._initialize_output_files()
         )
@@ -74,7 +110,7 @@ class MedicalDataExtractor:
 
     def _initialize_output_files(self) -> Tuple[str, str, str]:
         """Define output files (*ocr.md, *medication.json, *medication.md)"""
-        base_name = Path(self.input_pdf).stem
+        base_name = self.output_name
         os.makedirs(self.output_dir, exist_ok=True)
         output_path = Path(self.output_dir).absolute()
         output_ocr_file = os.path.join(output_path, f"{base_name}_ocr.md")
@@ -85,7 +121,9 @@ class MedicalDataExtractor:
     def perform_ocr(self) -> str:
         """Perform OCR on the PDF file"""
         logger.info("Stage 1 - Performing OCR on PDF file")
-        pdf_content = ocr.ocr_processor(self.input_pdf, self.client, self.ocr_model)
+        pdf_content = ocr.ocr_processor(
+            self.input_pdf, self.client, self.ocr_model, self.hedger
+        )
         return pdf_content
 
     def save_ocr_output(self, pdf_content: str):
@@ -93,31 +131,122 @@ class MedicalDataExtractor:
         logger.info("\t Saving OCR output to markdown file")
         utils.save_markdown_file(pdf_content, self.output_ocr_file)
 
-    def extract_data(self, pdf_content: str) -> Dict[str, Any]:
+    def store_ocr_output(self, pdf_content: str):
+        """Append OCR output to the OCR corpus (keyed by OCR output hash)"""
+        logger.info("\t Storing OCR output in OCR corpus")
+        key = corpus.hash_text(pdf_content)
+        if not self.ocr_corpus.add(key, self.output_name, pdf_content):
+            logger.info("\t Document already stored in OCR corpus")
+
+    def compact_content(self, pdf_content: str) -> str:
+        """Compact OCR output before LLM extraction (optional token budget)"""
+        logger.info("\t Compacting OCR output")
+        return compaction.compact_context(pdf_content, self.token_budget)
+
+    def extract_data(
+        self, pdf_content: str, text_model: Optional[str] = None, clean: bool = True
+    ) -> Dict[str, Any]:
         """Extract data using LLM model"""
-        logger.info("Stage 2 - Data extraction via LLM")
+        text_model = text_model or self.text_model
+        logger.info("Stage 2 - Data extraction via LLM (%s)", text_model)
         medication_json = extraction.llm_extraction(
-            self.text_model, self.client, pdf_content, self.rag
+            text_model,
+            self.client,
+            pdf_content,
+            self.rag,
+            self.hedger,
+            self.cassette,
         )
-        logger.info("\t Cleaning LLM JSON output")
-        medication_json = schema.clean_json(medication_json)
+        if clean:
+            medication_json = self.clean_data(medication_json)
         return medication_json
 
-    def doc_qna(self) -> Dict[str, Any]:
+    def doc_qna(
+        self, text_model: Optional[str] = None, clean: bool = True
+    ) -> Dict[str, Any]:
         """Direct document Question & Answer - OCR + LLM combined"""
-        logger.info("Stage 1 & 2 - OCR + LLM data extraction")
+        text_model = text_model or self.text_model
+        logger.info("Stage 1 & 2 - OCR + LLM data extraction (%s)", text_model)
         medication_json = extraction.llm_qna(
-            self.text_model, self.client, self.input_pdf
+            text_model, self.client, self.input_pdf, self.hedger
         )
-        logger.info("\t Cleaning LLM JSON output")
-        medication_json = schema.clean_json(medication_json)
+        if clean:
+            medication_json = self.clean_data(medication_json)
         return medication_json
 
     @staticmethod
-    def validate_data(medication_json: Dict[str, Any]) -> Dict[str, Any]:
+    def clean_data(medication_json: Dict[str, Any]) -> Dict[str, Any]:
+        """Clean LLM JSON output (e.g. combine dosage and frequency)"""
+        logger.info("\t Cleaning LLM JSON output")
+        return schema.clean_json(medication_json)
+
+    def validate_data(self, medication_json: Dict[str, Any]) -> Dict[str, Any]:
         """Validate extracted data using OpenFDA API"""
         logger.info("Stage 3 - Data validation via OpenFDA API")
-        medication_json_valid = validation.validate_medication(medication_json)
+        medication_json_valid = validation.validate_medication(
+            medication_json, self.cassette
+        )
+        return medication_json_valid
+
+    def extract_and_validate(
+        self, text_model: str, pdf_content: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Data extraction and validation for one LLM model (Stage 2 & 3)
+        Notes: LLM JSON output not cleaned, to keep raw dosage fields
+        """
+        if self.direct_qna:
+            medication_json = self.doc_qna(text_model, clean=False)
+        else:
+            medication_json = self.extract_data(pdf_content, text_model, clean=False)
+        return self.validate_data(medication_json)
+
+    def run_cascade(self, pdf_content: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Model cascade - run the fast model first, and escalate to the
+        fallback model only when acceptance checks fail
+        """
+        text_models = [self.text_model]
+        if self.fallback_text_model:
+            text_models.append(self.fallback_text_model)
+
+        # Validated output rejected by acceptance checks (kept if escalation fails)
+        rejected_output = None
+        for tier, text_model in enumerate(text_models):
+            last_tier = tier == len(text_models) - 1
+            try:
+                medication_json_valid = self.extract_and_validate(
+                    text_model, pdf_content
+                )
+                issues = []
+                if not last_tier:
+                    issues = cascade.check_acceptance(
+                        medication_json_valid, self.max_invalid_ratio
+                    )
+                medication_json_valid = self.clean_data(medication_json_valid)
+            except (ValueError, KeyError) as error:
+                # Malformed LLM output - escalate unless no larger model left
+                logger.warning("\t Invalid output from %s: %s", text_model, error)
+                if not last_tier:
+                    continue
+                if rejected_output is None:
+                    raise
+                medication_json_valid, tier, text_model = rejected_output
+                logger.warning("\t Keeping rejected output from %s", text_model)
+                break
+
+            if not issues:
+                break
+            rejected_output = (medication_json_valid, tier, text_model)
+            logger.info(
+                "\t Escalating from %s to %s - %s",
+                text_model,
+                text_models[tier + 1],
+                "; ".join(issues),
+            )
+
+        self.answered_text_model = text_model
+        logger.info("\t Answer provided by model tier %d (%s)", tier, text_model)
         return medication_json_valid
 
     def save_output_files(self, medication_json_valid: Dict[str, Any]):
@@ -127,12 +256,29 @@ class MedicalDataExtractor:
         medication_md_valid = schema.convert_json_to_md(medication_json_valid)
         utils.save_markdown_file(medication_md_valid, self.output_md_file)
 
+    def run_extraction_stages(self, span: Any, pdf_content: Optional[str] = None):
+        """Stage 2 to 4 within workflow span (optional OCR output compaction)"""
+        # Optional - Compact OCR output
+        if self.compact_context:
+            pdf_content = self.compact_content(pdf_content)
+
+        # Stage 2 & 3 - Data extraction and validation (model cascade)
+        medication_json_valid = self.run_cascade(pdf_content)
+        span.set_attribute("answered_llm_model", self.answered_text_model)
+        span.set_output(value=medication_json_valid)
+
+        # Stage 4 - Save output files
+        self.save_output_files(medication_json_valid)
+
+        span.set_status(Status(StatusCode.OK))
+
     def run_workflow(self):
         """
         Main workflow:
           - Stage 1 - OCR on PDF
           - Stage 2 - Data extraction
           - Stage 3 - Data validation
+          (Stage 2 & 3 escalate to the fallback model when checks fail)
           - Stage 4 - Saving output files
         """
         print("----------")
@@ -155,12 +301,12 @@ class MedicalDataExtractor:
                 "llm_model": self.text_model,
                 "rag": self.rag,
                 "direct_qna": self.direct_qna,
+                "fallback_llm_model": self.fallback_text_model,
             }
             span.set_input(value=span_input_value)
 
-            if self.direct_qna:
-                medication_json = self.doc_qna()
-            else:
+            pdf_content = None
+            if not self.direct_qna:
                 # Stage 1 - Perform OCR on PDF file
                 pdf_content = self.perform_ocr()
 
@@ -168,14 +314,99 @@ class MedicalDataExtractor:
                 if self.qc_ocr:
                     self.save_ocr_output(pdf_content)
 
-                # Stage 2 - Data extraction
-                medication_json = self.extract_data(pdf_content)
+                # Optional - Store OCR output in OCR corpus
+                if self.ocr_corpus is not None:
+                    self.store_ocr_output(pdf_content)
+
+            # Stage 2 to 4 - Data extraction, validation and output files
+            self.run_extraction_stages(span, pdf_content)
+
+    def run_reextraction(self, pdf_content: str):
+        """
+        Re-extraction workflow, on stored OCR output:
+          - Stage 2 - Data extraction
+          - Stage 3 - Data validation
+          - Stage 4 - Saving output files
+        """
+        with tracer.start_as_current_span(
+            "Reextraction_workflow", openinference_span_kind="chain"
+        ) as span:
+            span_input_value = {
+                "document": self.output_name,
+                "llm_model": self.text_model,
+                "rag": self.rag,
+                "fallback_llm_model": self.fallback_text_model,
+            }
+            span.set_input(value=span_input_value)
+
+            # Stage 2 to 4 - Data extraction, validation and output files
+            self.run_extraction_stages(span, pdf_content)
+
+
+def reextract_corpus(
+    ocr_corpus: corpus.OCRCorpus,
+    output_dir: str,
+    text_model: str,
+    max_workers: int = 4,
+    **extractor_kwargs,
+) -> Tuple[int, int]:
+    """
+    Re-extraction over OCR corpus (Stage 2 to 4, no OCR)
+    Args:
+        - ocr_corpus: OCR corpus
+        - output_dir: output folder
+        - text_model: LLM text model
+        - max_workers: number of documents processed concurrently
+        - extractor_kwargs: additional MedicalDataExtractor options
+    Returns:
+        - number of processed documents, number of failed documents
+    """
+    print("----------")
+    print("MEDICAL DATA RE-EXTRACTION")
+    print("----------")
+    logger.info("Re-extraction on %d documents", len(ocr_corpus))
+
+    # Shared mistral client across documents
+    mistral_client = Mistral(api_key=Settings().mistral_api_key)
+
+    def reextract_document(key: str, name: str, pdf_content: str):
+        """Re-extraction on one document"""
+        data_extractor = MedicalDataExtractor(
+            input_pdf=None,
+            output_dir=output_dir,
+            text_model=text_model,
+            # Output files named after document name and hash
+            output_name=f"{name}_{key[:8]}",
+            mistral_client=mistral_client,
+            **extractor_kwargs,
+        )
+        data_extractor.run_reextraction(pdf_content)
+
+    # Stream documents, with a bounded number of pending documents
+    nb_processed, nb_failed = 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        for key, name, pdf_content in ocr_corpus.iter_documents():
+            future = executor.submit(reextract_document, key, name, pdf_content)
+            pending[future] = name
+            if len(pending) < 2 * max_workers:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                nb_failed += _check_reextraction(future, pending.pop(future))
+                nb_processed += 1
+        for future in list(pending):
+            nb_failed += _check_reextraction(future, pending.pop(future))
+            nb_processed += 1
 
-            # Stage 3 - Data validation
-            medication_json_valid = self.validate_data(medication_json)
-            span.set_output(value=medication_json_valid)
+    logger.info("Re-extraction done - %d documents, %d failed", nb_processed, nb_failed)
+    return nb_processed, nb_failed
 
-            # Stage 4 - Save output files
-            self.save_output_files(medication_json_valid)
 
-            span.set_status(Status(StatusCode.OK))
+def _check_reextraction(future, name: str) -> int:
+    """Log re-extraction failure, returns 1 if failed"""
+    error = future.exception()
+    if error is None:
+        return 0
+    logger.error("\t Re-extraction failed on %s: %s", name, error)
+    return 1
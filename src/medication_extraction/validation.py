@@ -3,20 +3,28 @@ External medication validation - openfda API
 """
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 import requests
 
+from .cassette import Cassette, recorded_call
 from .phoenix_tracer import tracer
 
 logger = logging.getLogger(__name__)
 
 
-def openfda_query(medication_name: str) -> bool:
+def openfda_request(api_query: str) -> Tuple[int, Dict[str, Any]]:
+    """OpenFDA API request - returns status code and JSON data"""
+    response = requests.get(api_query, timeout=5)
+    return response.status_code, response.json()
+
+
+def openfda_query(medication_name: str, cassette: Optional[Cassette] = None) -> bool:
     """
     OpenFDA API Query - Structure Product Labeling
     Notes: Validates medication name existence via OpenFDA database
     Args:
       - Name of medication
+      - Optional cassette (record / replay API traffic)
     Returns:
       - Boolean based on medication name existence (successful query)
     """
@@ -25,33 +33,34 @@ def openfda_query(medication_name: str) -> bool:
     api_query = f'https://api.fda.gov/drug/label.json?search=openfda.brand_name.exact="{medication_name}"&limit=1'
     logger.debug("\t API query: %s", api_query)
 
-    response = requests.get(api_query, timeout=5)
-    data = response.json()
+    status_code, data = recorded_call(
+        cassette, "openfda.drug.label", openfda_request, api_query=api_query
+    )
     results = data.get("results", [])
 
-    if response.status_code == 200 and len(results) != 0:
+    if status_code == 200 and len(results) != 0:
         medication_name_valid = True
-    elif response.status_code == 404 and data["error"]["code"] == "NOT_FOUND":
+    elif status_code == 404 and data["error"]["code"] == "NOT_FOUND":
         logger.warning("\t Medication name: %s", medication_name)
         logger.warning("\t API error code: %s", data["error"]["code"])
         medication_name_valid = False
     else:
-        logger.warning(
-            "\t API request failed with status code: %d", response.status_code
-        )
+        logger.warning("\t API request failed with status code: %d", status_code)
         medication_name_valid = False
 
     return medication_name_valid
 
 
 @tracer.chain
-def validate_medication(json_object: Dict[str, Any]) -> Dict[str, Any]:
+def validate_medication(
+    json_object: Dict[str, Any], cassette: Optional[Cassette] = None
+) -> Dict[str, Any]:
     """Medication name validation - via openFDA database"""
     medication_list = json_object["medications"]
     for _, item in enumerate(medication_list):
         medication_name = item["medication"]
         logger.debug("\t Medication name: %s", medication_name)
-        medication_name_valid = openfda_query(medication_name)
+        medication_name_valid = openfda_query(medication_name, cassette)
         logger.debug("\t Medication name - validation: %d", medication_name_valid)
 
         # Add / replace json value
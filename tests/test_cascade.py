@@ -0,0 +1,61 @@
+"""
+Testing cascade module
+"""
+
+import pytest
+
+from src.medication_extraction import cascade
+from src.medication_extraction import schema
+
+
+@pytest.fixture
+def medication_json():
+    """Fixture - validated JSON object (LLM output before cleaning)"""
+    medical_report = schema.MedicalReport(
+        patient_info=schema.PatientInfo(
+            name="Jane Doe",
+            dob="01/01/1970",
+            age=55,
+            gender="Female",
+            mrn="123456",
+            admission_date="01/01/2025",
+            discharge_date="01/05/2025",
+        ),
+        medications=[
+            schema.MedicationItem(
+                medication="Aspirin",
+                dosage_info="10 mg",
+                frequency_info="Daily",
+                additional_information={},
+            ),
+        ],
+    )
+    json_object = medical_report.model_dump()
+    json_object["medications"][0]["validated"] = True
+    return json_object
+
+
+def test_check_acceptance(medication_json):
+    """Test check_acceptance function - accepted output"""
+    assert not cascade.check_acceptance(medication_json)
+
+
+@pytest.mark.parametrize("dosage_info", ["None", ""])
+def test_check_acceptance_empty_dosage(medication_json, dosage_info):
+    """Test check_acceptance function - empty dosage (e.g. "None" before cleaning)"""
+    medication_json["medications"][0]["dosage_info"] = dosage_info
+    assert cascade.check_acceptance(medication_json) == [
+        "1 medication(s) with empty dosage"
+    ]
+
+
+def test_check_acceptance_failures(medication_json):
+    """Test check_acceptance function - rejected output"""
+    medication_json["patient_info"]["mrn"] = "None"
+    medication_json["medications"][0]["dosage_info"] = "None"
+    medication_json["medications"][0]["validated"] = False
+    issues = cascade.check_acceptance(medication_json)
+    assert len(issues) == 3
+
+    medication_json["medications"] = []
+    assert "no medication extracted" in cascade.check_acceptance(medication_json)
@@ -0,0 +1,265 @@
+"""
+Testing cassette module
+"""
+
+import os
+import json
+import importlib.util
+from types import SimpleNamespace
+from typing import List
+import pytest
+from pydantic import BaseModel
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.medication_extraction import cassette
+from src.medication_extraction import extraction
+from src.medication_extraction import ocr
+from src.medication_extraction import schema
+from src.medication_extraction import utils
+from src.medication_extraction import validation
+
+
+class FakeChat:
+    """Fake chat API"""
+
+    def __init__(self):
+        self.nb_calls = 0
+
+    def parse(self, model, messages):
+        """Fake chat response"""
+        self.nb_calls += 1
+        return {"model": model, "content": messages[0]["content"].upper()}
+
+
+def test_cassette_record_replay(tmp_path):
+    """Test cassette - record API responses, then replay without API call"""
+    cassette_file = str(tmp_path / "cassette.json.gz")
+    fake_client = SimpleNamespace(chat=FakeChat())
+    messages = [{"role": "user", "content": "aspirin"}]
+
+    record_cassette = cassette.Cassette(cassette_file, cassette.RECORD)
+    client = record_cassette.wrap_client(fake_client)
+    response = client.chat.parse(model="ministral-3b-latest", messages=messages)
+    record_cassette.save()
+    assert response["content"] == "ASPIRIN"
+    assert fake_client.chat.nb_calls == 1
+
+    replay_cassette = cassette.Cassette(cassette_file, cassette.REPLAY)
+    client = replay_cassette.wrap_client(fake_client)
+    response = client.chat.parse(model="ministral-3b-latest", messages=messages)
+    assert response["content"] == "ASPIRIN"
+    assert fake_client.chat.nb_calls == 1
+
+    # Unknown request fingerprint
+    with pytest.raises(LookupError):
+        client.chat.parse(model="mistral-small-latest", messages=messages)
+
+
+class FakeMessage(BaseModel):
+    """Fake SDK chat message"""
+
+    content: str
+
+
+class FakeChoice(BaseModel):
+    """Fake SDK chat choice"""
+
+    message: FakeMessage
+
+
+class FakeChatResponse(BaseModel):
+    """Fake SDK chat response"""
+
+    choices: List[FakeChoice]
+
+
+class FakePage(BaseModel):
+    """Fake SDK OCR page"""
+
+    markdown: str
+    image_base64: str = "iVBORw0KGgo="
+
+
+class FakeOCRResponse(BaseModel):
+    """Fake SDK OCR response"""
+
+    pages: List[FakePage]
+
+
+class FakeMistralClient:
+    """Fake mistral client, returning pydantic SDK-like responses"""
+
+    def __init__(self):
+        self.nb_calls = 0
+        self.chat = SimpleNamespace(parse=self.parse)
+        self.ocr = SimpleNamespace(process=self.process)
+
+    def parse(self, **kwargs):
+        """Fake chat.parse response"""
+        self.nb_calls += 1
+        content = {"patient_info": {"name": "Jane Doe"}, "medications": []}
+        return FakeChatResponse(
+            choices=[FakeChoice(message=FakeMessage(content=json.dumps(content)))]
+        )
+
+    def process(self, **kwargs):
+        """Fake ocr.process response"""
+        self.nb_calls += 1
+        return FakeOCRResponse(
+            pages=[FakePage(markdown="# Page one"), FakePage(markdown="# Page two")]
+        )
+
+
+class FailingEmbeddings(DeterministicFakeEmbedding):
+    """Embedding model failing on any request (replay mode)"""
+
+    def embed_documents(self, texts):
+        raise AssertionError("Embedding request not replayed")
+
+    def embed_query(self, text):
+        raise AssertionError("Embedding request not replayed")
+
+
+def test_cassette_replay_sdk_responses(tmp_path, monkeypatch):
+    """Test cassette - replay of OCR, chat and embedding requests"""
+    cassette_file = str(tmp_path / "cassette.json.gz")
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    input_pdf = os.path.join(test_dir, "data_example", "Example_MedicalReport.pdf")
+    pdf_content = "# Medications\n\nAspirin 10 mg\n\n# History\n\nNone"
+
+    # Record mode
+    record_cassette = cassette.Cassette(cassette_file, cassette.RECORD)
+    fake_client = FakeMistralClient()
+    client = record_cassette.wrap_client(fake_client)
+    monkeypatch.setattr(
+        extraction,
+        "MistralAIEmbeddings",
+        lambda model: DeterministicFakeEmbedding(size=8),
+    )
+    recorded_ocr = ocr.ocr_processor(input_pdf, client, "mistral-ocr-latest")
+    recorded_json = extraction.llm_extraction(
+        "ministral-3b-latest", client, pdf_content, rag=True, cassette=record_cassette
+    )
+    record_cassette.save()
+
+    # Replay mode - SDK responses rebuilt from JSON, no API call
+    replay_cassette = cassette.Cassette(cassette_file, cassette.REPLAY)
+    client = replay_cassette.wrap_client(fake_client)
+    monkeypatch.setattr(
+        extraction, "MistralAIEmbeddings", lambda model: FailingEmbeddings(size=8)
+    )
+    assert ocr.ocr_processor(input_pdf, client, "mistral-ocr-latest") == recorded_ocr
+    assert "# Page two" in recorded_ocr
+    replayed_json = extraction.llm_extraction(
+        "ministral-3b-latest", client, pdf_content, rag=True, cassette=replay_cassette
+    )
+    assert replayed_json == recorded_json
+    assert fake_client.nb_calls == 2
+
+    # Redacted image payloads
+    ocr_response = client.ocr.process(
+        model="mistral-ocr-latest",
+        document={
+            "type": "document_url",
+            "document_url": "data:application/pdf;base64,"
+            + utils.encode_pdf(input_pdf),
+        },
+        include_image_base64=True,
+    )
+    assert not hasattr(ocr_response.pages[0], "image_base64")
+
+
+def test_cassette_replay_openfda(tmp_path, monkeypatch):
+    """Test cassette - replay of OpenFDA requests (status code and JSON data)"""
+    cassette_file = str(tmp_path / "cassette.json.gz")
+    responses = {
+        "Aspirin": (200, {"results": [{"id": "1"}]}),
+        "Unknown": (404, {"error": {"code": "NOT_FOUND"}}),
+    }
+
+    def openfda_request(api_query):
+        return next(value for name, value in responses.items() if name in api_query)
+
+    record_cassette = cassette.Cassette(cassette_file, cassette.RECORD)
+    monkeypatch.setattr(validation, "openfda_request", openfda_request)
+    assert validation.openfda_query("Aspirin", record_cassette)
+    assert not validation.openfda_query("Unknown", record_cassette)
+    record_cassette.save()
+
+    def failing_request(api_query):
+        raise AssertionError("OpenFDA request not replayed")
+
+    replay_cassette = cassette.Cassette(cassette_file, cassette.REPLAY)
+    monkeypatch.setattr(validation, "openfda_request", failing_request)
+    assert validation.openfda_query("Aspirin", replay_cassette)
+    assert not validation.openfda_query("Unknown", replay_cassette)
+
+
+def test_cassette_fingerprint_schema():
+    """Test request fingerprint - schema class imported via another path"""
+    spec = importlib.util.spec_from_file_location(
+        "medication_extraction.schema", schema.__file__
+    )
+    other_schema = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(other_schema)
+    assert other_schema.MedicalReport is not schema.MedicalReport
+
+    kwargs = {"model": "ministral-3b-latest", "response_format": schema.MedicalReport}
+    other_kwargs = dict(kwargs, response_format=other_schema.MedicalReport)
+    assert cassette.request_fingerprint("mistral.chat.parse", kwargs) == (
+        cassette.request_fingerprint("mistral.chat.parse", other_kwargs)
+    )
+
+    # Schema updates change request fingerprint
+    schema_kwargs = dict(kwargs, response_format=schema.PatientInfo)
+    assert cassette.request_fingerprint("mistral.chat.parse", kwargs) != (
+        cassette.request_fingerprint("mistral.chat.parse", schema_kwargs)
+    )
+
+
+def test_cassette_replay_other_import_path(tmp_path):
+    """Test cassette - replay with schema class imported via another path"""
+    spec = importlib.util.spec_from_file_location(
+        "medication_extraction.schema", schema.__file__
+    )
+    other_schema = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(other_schema)
+    cassette_file = str(tmp_path / "cassette.json.gz")
+    fake_client = FakeMistralClient()
+    messages = [{"role": "user", "content": "aspirin"}]
+
+    record_cassette = cassette.Cassette(cassette_file, cassette.RECORD)
+    client = record_cassette.wrap_client(fake_client)
+    client.chat.parse(
+        model="ministral-3b-latest",
+        messages=messages,
+        response_format=other_schema.MedicalReport,
+    )
+    record_cassette.save()
+
+    replay_cassette = cassette.Cassette(cassette_file, cassette.REPLAY)
+    client = replay_cassette.wrap_client(fake_client)
+    response = client.chat.parse(
+        model="ministral-3b-latest",
+        messages=messages,
+        response_format=schema.MedicalReport,
+    )
+    assert "Jane Doe" in response.choices[0].message.content
+    assert fake_client.nb_calls == 1
+
+
+def test_cassette_replay_error(tmp_path):
+    """Test cassette - API errors recorded, and raised again on replay"""
+    cassette_file = str(tmp_path / "cassette.json.gz")
+
+    def failing_api(value):
+        raise TimeoutError(f"Request {value} timed out")
+
+    record_cassette = cassette.Cassette(cassette_file, cassette.RECORD)
+    with pytest.raises(TimeoutError):
+        record_cassette.call("mistral.ocr.process", failing_api, value=1)
+    record_cassette.save()
+
+    replay_cassette = cassette.Cassette(cassette_file, cassette.REPLAY)
+    with pytest.raises(TimeoutError, match="Request 1 timed out"):
+        replay_cassette.call("mistral.ocr.process", failing_api, value=1)
@@ -2,8 +2,11 @@
 Testing module on CLI
 """
 
+import os
 from typer.testing import CliRunner
-from src.medication_extraction.main import app
+from src.medication_extraction.cassette import RECORD, REPLAY, Cassette
+from src.medication_extraction.hedging import RequestHedger
+from src.medication_extraction.main import app, reextract_app, save_run_state
 
 
 runner = CliRunner()
@@ -12,3 +15,23 @@ runner = CliRunner()
 def test_extract():
     result = runner.invoke(app, ["--help"])
     assert result.exit_code == 0
+
+
+def test_reextract():
+    result = runner.invoke(reextract_app, ["--help"])
+    assert result.exit_code == 0
+
+
+def test_save_run_state_replay(tmp_path):
+    """Test save_run_state function - replayed latencies not saved"""
+    cassette_file = str(tmp_path / "cassette.json.gz")
+    latency_file = str(tmp_path / "latencies.json")
+    hedger = RequestHedger()
+    hedger.call("chat:model", lambda: None)
+
+    save_run_state(Cassette(cassette_file, RECORD), hedger, latency_file)
+    assert os.path.exists(latency_file)
+    os.remove(latency_file)
+
+    save_run_state(Cassette(cassette_file, REPLAY), hedger, latency_file)
+    assert not os.path.exists(latency_file)
@@ -0,0 +1,135 @@
+"""
+Testing compaction module
+"""
+
+from src.medication_extraction import compaction
+
+
+PDF_CONTENT = """# Hospital ABC - Discharge Summary
+
+![img-0.jpeg](img-0.jpeg)
+
+| Medication   |   Dosage    |
+|--------------|-------------|
+| Aspirin      |   10 mg     |
+
+Page footer - confidential
+
+### Page 1
+
+
+
+# Hospital ABC - Discharge Summary
+
+Discharge medications: Aspirin 10 mg daily
+
+Page footer - confidential
+
+### Page 2
+
+"""
+
+
+def test_compact_context():
+    """Test compact_context function"""
+    compacted_content = compaction.compact_context(PDF_CONTENT)
+    assert "img-0.jpeg" not in compacted_content
+    assert "### Page" not in compacted_content
+    assert compacted_content.count("Hospital ABC") == 1
+    assert compacted_content.count("Page footer") == 1
+    assert "| Aspirin | 10 mg |" in compacted_content
+    assert "Discharge medications: Aspirin 10 mg daily" in compacted_content
+    assert compaction.estimate_tokens(compacted_content) < (
+        compaction.estimate_tokens(PDF_CONTENT)
+    )
+
+
+def test_compact_context_token_budget():
+    """Test compact_context function - token budget"""
+    compacted_content = compaction.compact_context(PDF_CONTENT, token_budget=20)
+    assert 0 < compaction.estimate_tokens(compacted_content) <= 20
+
+
+PDF_CONTENT_MEDICATIONS = """# Hospital ABC - Discharge Summary
+
+Admission medications:
+- Lisinopril 10 mg daily
+- Aspirin 81 mg daily
+
+| Medication | Dosage |
+|---|---|
+| Aspirin | 10 mg |
+
+### Page 1
+
+# Hospital ABC - Discharge Summary
+
+| Medication | Dosage |
+|---|---|
+| Aspirin | 10 mg |
+
+Discharge medications:
+- Lisinopril 10 mg daily
+- Aspirin 81 mg daily
+
+### Page 2
+"""
+
+
+def test_compact_context_repeated_medications():
+    """Test compact_context function - medications repeated across pages"""
+    compacted_content = compaction.compact_context(PDF_CONTENT_MEDICATIONS)
+    assert compacted_content.count("Hospital ABC") == 1
+    assert compacted_content.count("- Lisinopril 10 mg daily") == 2
+    assert compacted_content.count("- Aspirin 81 mg daily") == 2
+    assert compacted_content.count("| Medication | Dosage |") == 2
+    assert compacted_content.count("|---|---|") == 2
+    assert compacted_content.count("| Aspirin | 10 mg |") == 2
+    assert compacted_content.endswith("- Aspirin 81 mg daily")
+
+
+def test_compact_context_truncation():
+    """Test compact_context function - document end kept, no empty context"""
+    compacted_content = compaction.compact_context(
+        PDF_CONTENT_MEDICATIONS, token_budget=30
+    )
+    assert compacted_content.startswith("# Hospital ABC")
+    assert compacted_content.endswith("- Aspirin 81 mg daily")
+
+    compacted_content = compaction.compact_context("x " * 100, token_budget=5)
+    assert 0 < compaction.estimate_tokens(compacted_content) <= 5
+    assert compaction.compact_context("x" * 100, token_budget=5)
+
+
+PDF_CONTENT_SHORT_PAGES = """Hospital ABC
+Aspirin 81 mg daily
+Follow up with cardiology
+
+### Page 1
+
+Hospital ABC
+Lab results normal
+
+### Page 2
+
+Hospital ABC
+Metformin 500 mg twice daily
+Aspirin 81 mg daily
+
+### Page 3
+"""
+
+
+def test_compact_context_short_pages():
+    """Test compact_context function - plain-text medications on short pages"""
+    compacted_content = compaction.compact_context(PDF_CONTENT_SHORT_PAGES)
+    assert compacted_content.count("Hospital ABC") == 1
+    assert compacted_content.count("Aspirin 81 mg daily") == 2
+    assert "Metformin 500 mg twice daily" in compacted_content
+
+
+def test_compact_line_indentation():
+    """Test compact_line function - nested list indentation kept"""
+    assert compaction.compact_line("    - Aspirin   81 mg  ") == "    - Aspirin 81 mg"
+    assert compaction.compact_line("  | Aspirin  |  10 mg |") == "  | Aspirin | 10 mg |"
+    assert compaction.compact_line("   ![img-0.jpeg](img-0.jpeg)  ") == ""
@@ -0,0 +1,54 @@
+"""
+Testing corpus module
+"""
+
+from src.medication_extraction import corpus
+from src.medication_extraction import utils
+
+
+def test_ocr_corpus(tmp_path):
+    """Test OCR corpus - append, read and stream documents"""
+    ocr_corpus = corpus.OCRCorpus(str(tmp_path / "corpus"))
+    assert ocr_corpus.add("key_1", "report_1", "# Report 1\n\nAspirin 10 mg")
+    assert ocr_corpus.add("key_2", "report_2", "# Report 2")
+    assert not ocr_corpus.add("key_1", "report_1", "# Report 1")
+
+    # Re-open corpus from offset index
+    ocr_corpus = corpus.OCRCorpus(str(tmp_path / "corpus"))
+    assert len(ocr_corpus) == 2
+    assert ocr_corpus.get("key_2") == "# Report 2"
+    documents = list(ocr_corpus.iter_documents())
+    assert documents[0] == ("key_1", "report_1", "# Report 1\n\nAspirin 10 mg")
+
+    # Import OCR markdown file
+    ocr_file = str(tmp_path / "report_3_ocr.md")
+    utils.save_markdown_file("# Report 3", ocr_file)
+    assert ocr_corpus.add_markdown_file(ocr_file)
+    assert ocr_corpus.get(corpus.hash_text("# Report 3")) == "# Report 3"
+
+
+def test_ocr_corpus_torn_index(tmp_path):
+    """Test OCR corpus - torn final index line, documents added by another run"""
+    corpus_dir = str(tmp_path / "corpus")
+    ocr_corpus = corpus.OCRCorpus(corpus_dir)
+    other_corpus = corpus.OCRCorpus(corpus_dir)
+    assert ocr_corpus.add("key_1", "report_1", "# Report 1")
+    assert not other_corpus.add("key_1", "report_1", "# Report 1")
+    assert other_corpus.add("key_2", "report_2", "# Report 2")
+
+    # Interrupted append
+    with open(ocr_corpus.index_file, "a", encoding="utf-8") as f:
+        f.write('{"key": "key_3", "na')
+
+    ocr_corpus = corpus.OCRCorpus(corpus_dir)
+    assert len(ocr_corpus) == 2
+    assert ocr_corpus.add("key_3", "report_3", "# Report 3")
+    assert corpus.OCRCorpus(corpus_dir).get("key_3") == "# Report 3"
+
+
+def test_ocr_corpus_without_fcntl(tmp_path, monkeypatch):
+    """Test OCRCorpus class - thread lock only (e.g. Windows)"""
+    monkeypatch.setattr(corpus, "fcntl", None)
+    ocr_corpus = corpus.OCRCorpus(str(tmp_path))
+    assert ocr_corpus.add("key", "report", "# Report")
+    assert ocr_corpus.get("key") == "# Report"
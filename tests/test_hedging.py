@@ -0,0 +1,59 @@
+"""
+Testing hedging module
+"""
+
+import time
+import itertools
+
+from src.medication_extraction import hedging
+
+
+def test_hedged_call():
+    """Test hedged call - slow request duplicated, fastest response used"""
+    hedger = hedging.RequestHedger(percentile=50.0, max_extra_load=1.0, min_samples=2)
+    for _ in range(4):
+        assert hedger.call("chat:model", lambda value: value, value=1) == 1
+
+    delays = itertools.chain([2.0], itertools.repeat(0.0))
+
+    def slow_api(value):
+        time.sleep(next(delays))
+        return value
+
+    start = time.perf_counter()
+    assert hedger.call("chat:model", slow_api, value=2) == 2
+    assert time.perf_counter() - start < 1.0
+    assert hedger.nb_hedges == 1
+
+
+def test_hedged_call_extra_load():
+    """Test hedged call - no hedged request beyond extra load budget"""
+    hedger = hedging.RequestHedger(percentile=50.0, max_extra_load=0.0, min_samples=1)
+    hedger.call("ocr:model", lambda: None)
+    hedger.call("ocr:model", lambda delay: time.sleep(delay), delay=0.05)
+    assert hedger.nb_hedges == 0
+    assert hedging.hedged_call(None, "ocr:model", lambda: 3) == 3
+
+
+def test_hedged_call_initial_delay(tmp_path):
+    """Test hedged call - initial delay before latencies, latencies persisted"""
+    hedger = hedging.RequestHedger(max_extra_load=0.1, initial_delay=0.1)
+    delays = itertools.chain([2.0], itertools.repeat(0.0))
+
+    def slow_api(value):
+        time.sleep(next(delays))
+        return value
+
+    start = time.perf_counter()
+    assert hedger.call("ocr:model", slow_api, value=1) == 1
+    assert time.perf_counter() - start < 1.0
+    assert hedger.nb_hedges == 1
+    # Primary elapsed time recorded (at least hedging delay), not hedge latency
+    assert hedger.latencies["ocr:model"][-1] >= 0.1
+
+    latency_file = str(tmp_path / "latencies.json")
+    hedger.save_latencies(latency_file)
+    new_hedger = hedging.RequestHedger()
+    new_hedger.load_latencies(latency_file)
+    latencies = list(hedger.latencies["ocr:model"])
+    assert list(new_hedger.latencies["ocr:model"]) == latencies
@@ -6,6 +6,7 @@ import os
 from pathlib import Path
 import pytest
 
+from src.medication_extraction import corpus
 from src.medication_extraction import pipeline
 from src.medication_extraction import utils
 
@@ -50,3 +51,87 @@ def test_run_workflow(cli_arguments, output_files):
     assert output_json["patient_info"]["name"] == "Jane Doe"
     assert output_json["medications"][0]["medication"] == "Aspirin"
     assert output_json["medications"][0]["dosage"] == "10 mg Daily"
+
+
+def test_run_cascade_fallback_error(cli_arguments, monkeypatch):
+    """Test run_cascade function - rejected output kept when fallback model fails"""
+    input_pdf, output_dir = cli_arguments
+    data_extractor = pipeline.MedicalDataExtractor(
+        input_pdf=input_pdf,
+        output_dir=output_dir,
+        ocr_model="mistral-ocr-latest",
+        text_model="ministral-3b-latest",
+        fallback_text_model="mistral-small-latest",
+    )
+
+    def extract_and_validate(text_model, pdf_content=None):
+        if text_model == "mistral-small-latest":
+            raise ValueError("Malformed LLM output")
+        return {
+            "patient_info": {"name": "Jane Doe"},
+            "medications": [
+                {
+                    "medication": "Aspirin",
+                    "dosage_info": "10 mg",
+                    "frequency_info": "Daily",
+                    "validated": True,
+                    "additional_information": {},
+                }
+            ],
+        }
+
+    monkeypatch.setattr(data_extractor, "extract_and_validate", extract_and_validate)
+    medication_json = data_extractor.run_cascade("# Report")
+    assert data_extractor.answered_text_model == "ministral-3b-latest"
+    assert medication_json["medications"][0]["dosage"] == "10 mg Daily"
+
+
+def test_compact_context_options(cli_arguments):
+    """Test MedicalDataExtractor class - context compaction options"""
+    input_pdf, output_dir = cli_arguments
+    data_extractor = pipeline.MedicalDataExtractor(
+        input_pdf=input_pdf, output_dir=output_dir, token_budget=1000
+    )
+    assert data_extractor.compact_context
+
+    with pytest.raises(ValueError):
+        pipeline.MedicalDataExtractor(
+            input_pdf=input_pdf,
+            output_dir=output_dir,
+            direct_qna=True,
+            compact_context=True,
+        )
+
+
+def test_reextract_corpus(tmp_path, monkeypatch):
+    """Test reextract_corpus function - Stage 2 to 4 on stored OCR outputs"""
+    ocr_corpus = corpus.OCRCorpus(str(tmp_path / "corpus"))
+    for name in ["report_1", "report_2", "report_failed"]:
+        content = f"# {name}"
+        ocr_corpus.add(corpus.hash_text(content), name, content)
+
+    def run_cascade(self, pdf_content=None):
+        if "failed" in pdf_content:
+            raise ValueError("Malformed LLM output")
+        return {
+            "patient_info": {
+                "name": "Jane Doe",
+                "dob": "None",
+                "age": 55,
+                "gender": "Female",
+                "mrn": "None",
+                "admission_date": "None",
+                "discharge_date": "None",
+            },
+            "medications": [],
+        }
+
+    monkeypatch.setattr(pipeline.MedicalDataExtractor, "run_cascade", run_cascade)
+    output_dir = str(tmp_path / "output")
+    nb_processed, nb_failed = pipeline.reextract_corpus(
+        ocr_corpus, output_dir=output_dir, text_model="ministral-3b-latest"
+    )
+    assert (nb_processed, nb_failed) == (3, 1)
+    key = corpus.hash_text("# report_1")
+    output_json_file = os.path.join(output_dir, f"report_1_{key[:8]}_medication.json")
+    assert utils.read_json_file(output_json_file)["patient_info"]["name"] == "Jane Doe"